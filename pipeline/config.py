@@ -13,10 +13,18 @@ SUPABASE_URL = os.environ.get("NEXT_PUBLIC_SUPABASE_URL", "")
 SUPABASE_ANON_KEY = os.environ.get("NEXT_PUBLIC_SUPABASE_ANON_KEY", "")
 SUPERMEMORY_API_KEY = os.environ.get("SUPERMEMORY_API_KEY", "")
 SUPERMEMORY_CONTAINER_TAG = os.environ.get("SUPERMEMORY_CONTAINER_TAG", "sm_project_constellations")
+GEMINI_RPM = int(os.environ.get("GEMINI_RPM", "60"))
+# Skip Gemini when PyMuPDF's own extraction of a simple layout looks clean
+LOCAL_EXTRACTION = os.environ.get("LOCAL_EXTRACTION", "1") != "0"
+# When set, pipelines run on RQ workers (pipeline/worker.py) instead of in-process
+REDIS_URL = os.environ.get("REDIS_URL", "")
 
 CACHE_DIR = Path(__file__).resolve().parent / ".cache"
 PDF_CACHE = CACHE_DIR / "pdfs"
+PDF_CACHE_MAX_BYTES = int(os.environ.get("PDF_CACHE_MAX_MB", "2048")) * 1024 * 1024
 DENSIFIED_CACHE = CACHE_DIR / "densified"
+# Size bound for each LLM output cache namespace (markdown, markdown_chunks)
+LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024
 
 # Ensure cache dirs exist
 PDF_CACHE.mkdir(parents=True, exist_ok=True)
@@ -1,6 +1,7 @@
 """PDF Ingestion Pipeline - FastAPI service."""
 
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,8 +9,16 @@ from fastapi.middleware.cors import CORSMiddleware
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
 from routers import ingest, status
+from stages.store import close_supermemory_client
 
-app = FastAPI(title="Constellations PDF Pipeline", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await close_supermemory_client()
+
+
+app = FastAPI(title="Constellations PDF Pipeline", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1,16 +1,27 @@
 """POST /ingest - triggers the PDF processing pipeline."""
 
 import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 
 from fastapi import APIRouter, BackgroundTasks
 from pydantic import BaseModel
-from supabase import create_client
 
-from config import SUPABASE_URL, SUPABASE_ANON_KEY
 from utils.arxiv import extract_arxiv_id
 from stages.download import download_pdf
 from stages.markdown import convert_pdf_to_markdown
-from stages.store import save_results, update_paper_status
+from stages.store import STATUS_CACHE, _get_supabase, save_results, update_paper_status
+from utils.queue import (
+    PIPELINE_JOB,
+    PIPELINE_JOB_TIMEOUT,
+    PIPELINE_QUEUE,
+    PIPELINE_QUEUE_TTL,
+    TAG_JOB,
+    TAG_QUEUE,
+    acquire_pipeline_lock,
+    get_queue,
+    release_pipeline_lock,
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -39,7 +50,7 @@ async def _run_pipeline(
         # Stage 2: Convert PDF to markdown via Gemini
         logger.info("[pipeline] Stage 2: Converting PDF to markdown for %s", arxiv_id)
         await update_paper_status(arxiv_id, "converting")
-        md = await convert_pdf_to_markdown(dl_result["pdf_bytes"])
+        md = await convert_pdf_to_markdown(Path(dl_result["pdf_path"]))
 
         # Stage 3: Store results
         logger.info("[pipeline] Stage 3: Storing results for %s", arxiv_id)
@@ -69,12 +80,16 @@ async def ingest(req: IngestRequest, background_tasks: BackgroundTasks):
         logger.warning("[ingest] Skipping non-arxiv URL: %s", req.paper_url)
         return {"status": "skipped", "reason": "not_arxiv"}
 
-    sb = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+    # A running pipeline may not have flushed its status to Supabase yet
+    if arxiv_id in STATUS_CACHE:
+        return {"status": "in_progress", "arxiv_id": arxiv_id}
+
+    sb = _get_supabase()
 
     # Check for existing record
     existing = (
         sb.table("paper_documents")
-        .select("status")
+        .select("status, updated_at")
         .eq("arxiv_id", arxiv_id)
         .limit(1)
         .execute()
@@ -85,31 +100,66 @@ async def ingest(req: IngestRequest, background_tasks: BackgroundTasks):
         logger.info("[ingest] Existing record for %s: status=%s", arxiv_id, current_status)
         if current_status == "complete":
             # Already processed - just tag the constellation in Supermemory
-            background_tasks.add_task(
-                _tag_constellation, arxiv_id, req.constellation_id
-            )
+            tag_queue = get_queue(TAG_QUEUE)
+            if tag_queue:
+                tag_queue.enqueue(TAG_JOB, arxiv_id, req.constellation_id)
+            else:
+                background_tasks.add_task(
+                    _tag_constellation, arxiv_id, req.constellation_id
+                )
             return {"status": "already_complete", "arxiv_id": arxiv_id}
-        if current_status in ("downloading", "converting"):
+        # Only failed rows and pending rows whose job was lost are retried;
+        # anything else is queued or running
+        if current_status not in ("failed", "pending"):
             return {"status": "in_progress", "arxiv_id": arxiv_id}
-        # If failed or pending, retry
-        logger.info("[ingest] Retrying %s (was %s)", arxiv_id, current_status)
-        sb.table("paper_documents").update({
+        # Matching on updated_at makes the retry a compare-and-set: of two
+        # concurrent retries only one gets the row back.
+        claim = sb.table("paper_documents").update({
             "status": "pending",
             "error_message": None,
-        }).eq("arxiv_id", arxiv_id).execute()
+        }).eq("arxiv_id", arxiv_id).eq("updated_at", existing.data[0]["updated_at"])
+        if current_status == "pending":
+            # The database judges staleness, so no timestamp parsing here: a row
+            # still pending after PIPELINE_QUEUE_TTL has lost its queued job
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=PIPELINE_QUEUE_TTL)
+            claim = claim.lt("updated_at", cutoff.isoformat())
+        claimed = claim.execute()
+        if not claimed.data:
+            logger.info("[ingest] %s is still queued or another retry claimed it", arxiv_id)
+            return {"status": "in_progress", "arxiv_id": arxiv_id}
+        logger.info("[ingest] Retrying %s (was %s)", arxiv_id, current_status)
     else:
-        # Insert new record
+        # Insert new record; ON CONFLICT DO NOTHING returns no row if a
+        # concurrent request inserted it first
         logger.info("[ingest] Creating new record for %s", arxiv_id)
-        sb.table("paper_documents").insert({
+        created = sb.table("paper_documents").upsert({
             "arxiv_id": arxiv_id,
             "paper_url": req.paper_url,
             "paper_title": req.paper_title,
             "status": "pending",
-        }).execute()
+        }, on_conflict="arxiv_id", ignore_duplicates=True).execute()
+        if not created.data:
+            logger.info("[ingest] Lost insert race for %s", arxiv_id)
+            return {"status": "in_progress", "arxiv_id": arxiv_id}
 
-    background_tasks.add_task(
-        _run_pipeline, arxiv_id, req.paper_url, req.paper_title, req.constellation_id
-    )
+    pipeline_queue = get_queue(PIPELINE_QUEUE)
+    if pipeline_queue:
+        # STATUS_CACHE lives in the worker process here, so guard with a Redis lock
+        if not acquire_pipeline_lock(arxiv_id):
+            logger.info("[ingest] Pipeline already queued for %s", arxiv_id)
+            return {"status": "in_progress", "arxiv_id": arxiv_id}
+        try:
+            pipeline_queue.enqueue(
+                PIPELINE_JOB, arxiv_id, req.paper_url, req.paper_title, req.constellation_id,
+                job_timeout=PIPELINE_JOB_TIMEOUT, ttl=PIPELINE_QUEUE_TTL,
+            )
+        except Exception:
+            release_pipeline_lock(arxiv_id)
+            raise
+    else:
+        background_tasks.add_task(
+            _run_pipeline, arxiv_id, req.paper_url, req.paper_title, req.constellation_id
+        )
     logger.info("[ingest] Pipeline started for %s", arxiv_id)
     return {"status": "started", "arxiv_id": arxiv_id}
 
@@ -1,26 +1,79 @@
 """GET /status/{arxiv_id} - check pipeline processing status."""
 
-from fastapi import APIRouter
-from supabase import create_client
+import hashlib
+import json
+import time
 
-from config import SUPABASE_URL, SUPABASE_ANON_KEY
+from fastapi import APIRouter, Request, Response
+
+from stages.store import STATUS_CACHE, _get_supabase
 
 router = APIRouter()
 
+# Columns returned by /status; cached in-progress rows are padded to the same keys
+_STATUS_COLUMNS = (
+    "arxiv_id", "status", "error_message", "pdf_pages", "word_count", "created_at", "updated_at",
+)
+
+# Short-lived cache of Supabase rows so rapid polling doesn't hit the DB each time
+_ROW_CACHE_TTL = 2.0
+_ROW_CACHE_MAX = 10_000
+_row_cache: dict[str, tuple[float, dict]] = {}
+
+
+def _get_cached_row(arxiv_id: str) -> dict | None:
+    entry = _row_cache.get(arxiv_id)
+    if entry is None:
+        return None
+    expires_at, row = entry
+    if expires_at < time.monotonic():
+        del _row_cache[arxiv_id]
+        return None
+    return row
+
+
+def _cache_row(arxiv_id: str, row: dict) -> None:
+    if len(_row_cache) >= _ROW_CACHE_MAX:
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in _row_cache.items() if expires_at < now]:
+            del _row_cache[key]
+        if len(_row_cache) >= _ROW_CACHE_MAX:
+            # Dicts keep insertion order, so this drops the oldest entry
+            del _row_cache[next(iter(_row_cache))]
+    _row_cache[arxiv_id] = (time.monotonic() + _ROW_CACHE_TTL, row)
+
+
+def _etag(payload: dict) -> str:
+    digest = hashlib.md5(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    return f'"{digest}"'
+
 
 @router.get("/status/{arxiv_id:path}")
-async def get_status(arxiv_id: str):
+async def get_status(arxiv_id: str, request: Request, response: Response):
     """Check the processing status of a paper."""
-    sb = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-    result = (
-        sb.table("paper_documents")
-        .select("arxiv_id, status, error_message, pdf_pages, word_count, created_at, updated_at")
-        .eq("arxiv_id", arxiv_id)
-        .maybe_single()
-        .execute()
-    )
-
-    if not result.data:
-        return {"found": False, "arxiv_id": arxiv_id}
-
-    return {"found": True, **result.data}
+    cached_status = STATUS_CACHE.get(arxiv_id)
+    if cached_status:
+        row = {column: cached_status.get(column) for column in _STATUS_COLUMNS}
+    else:
+        row = _get_cached_row(arxiv_id)
+    if not row:
+        sb = _get_supabase()
+        result = (
+            sb.table("paper_documents")
+            .select(", ".join(_STATUS_COLUMNS))
+            .eq("arxiv_id", arxiv_id)
+            .maybe_single()
+            .execute()
+        )
+
+        if not result.data:
+            return {"found": False, "arxiv_id": arxiv_id}
+        row = result.data
+        _cache_row(arxiv_id, row)
+
+    payload = {"found": True, **row}
+    etag = _etag(payload)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return payload
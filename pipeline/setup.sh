@@ -46,6 +46,7 @@ echo "Environment variables required in pipeline/.env:"
 echo "  GEMINI_API_KEY=..."
 echo "  SUPABASE_URL=..."
 echo "  SUPABASE_KEY=..."
+echo "  REDIS_URL=...  (optional; run pipelines on a worker via: python worker.py)"
 echo ""
 echo "To activate the virtual environment:"
 echo "  source pipeline/.venv/bin/activate"
@@ -0,0 +1,85 @@
+"""Content-hash disk cache for LLM stage outputs."""
+
+import hashlib
+import logging
+import os
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from config import CACHE_DIR, LLM_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_path(namespace: str, key_bytes: bytes | memoryview, version: str):
+    digest = hashlib.sha256(version.encode())
+    digest.update(key_bytes)
+    key = digest.hexdigest()[:32]
+    return CACHE_DIR / namespace / f"{key}.md"
+
+
+def _evict_lru(namespace_dir: Path, keep: Path) -> None:
+    """Delete least recently used entries until the namespace fits in LLM_CACHE_MAX_BYTES."""
+    entries = []
+    for path in namespace_dir.glob("*.md"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= LLM_CACHE_MAX_BYTES:
+            break
+        if path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        total -= size
+        logger.info("[cache] Evicted %s/%s", namespace_dir.name, path.name)
+
+
+def read_cached(namespace: str, key_bytes: bytes | memoryview, *, version: str) -> str | None:
+    """Return the cached result for `key_bytes`, or None on a miss."""
+    path = _cache_path(namespace, key_bytes, version)
+    try:
+        result = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    logger.info("[cache] Hit %s/%s", namespace, path.name)
+    # Mark as recently used for LRU eviction
+    os.utime(path)
+    return result
+
+
+def write_cached(namespace: str, key_bytes: bytes | memoryview, result: str, *, version: str) -> None:
+    """Store `result` for `key_bytes`, evicting old entries past the size bound."""
+    path = _cache_path(namespace, key_bytes, version)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(result, encoding="utf-8")
+    tmp_path.replace(path)
+    _evict_lru(path.parent, keep=path)
+
+
+async def cached_call(
+    namespace: str,
+    key_bytes: bytes | memoryview,
+    fn: Callable[[], Awaitable[str]],
+    *,
+    version: str,
+) -> str:
+    """
+    Return the cached result for `key_bytes`, or await `fn()` and cache it.
+
+    The key is a SHA-256 of `version` + `key_bytes`, so bumping a stage's
+    prompt version invalidates its entries. Empty results are not cached.
+    """
+    cached = read_cached(namespace, key_bytes, version=version)
+    if cached is not None:
+        return cached
+
+    result = await fn()
+    if result:
+        write_cached(namespace, key_bytes, result, version=version)
+    return result
@@ -1,42 +1,114 @@
 """Stage 1: Download PDF from arXiv."""
 
+import hashlib
+import json
 import logging
+import os
+from pathlib import Path
 
 import httpx
 
-from config import PDF_CACHE
+from config import PDF_CACHE, PDF_CACHE_MAX_BYTES
 from utils.arxiv import to_canonical_pdf_url
 
 logger = logging.getLogger(__name__)
 
+_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Response headers stored next to each cached PDF, compared on a HEAD request
+_VALIDATOR_HEADERS = ("last-modified", "content-length")
+
+
+def _cache_paths(pdf_url: str) -> tuple[Path, Path]:
+    """Return (pdf_path, metadata_path) for a canonical PDF URL."""
+    cache_key = hashlib.sha256(pdf_url.encode()).hexdigest()[:24]
+    return PDF_CACHE / f"{cache_key}.pdf", PDF_CACHE / f"{cache_key}.json"
+
+
+def _validators(headers: httpx.Headers) -> dict:
+    return {name: headers.get(name) for name in _VALIDATOR_HEADERS}
+
+
+async def _is_fresh(client: httpx.AsyncClient, pdf_url: str, meta_path: Path) -> bool:
+    """Check a cached PDF against the server's current Last-Modified/Content-Length."""
+    try:
+        stored = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return True  # Nothing to compare against; trust the cached file
+
+    try:
+        resp = await client.head(pdf_url)
+        resp.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning("[download] HEAD %s failed (%s), using cached PDF", pdf_url, e)
+        return True
+
+    current = _validators(resp.headers)
+    return not any(
+        stored.get(name) and current[name] and stored[name] != current[name]
+        for name in _VALIDATOR_HEADERS
+    )
+
+
+def _evict_lru(keep: Path) -> None:
+    """Delete least recently used PDFs until the cache fits in PDF_CACHE_MAX_BYTES."""
+    entries = []
+    for path in PDF_CACHE.glob("*.pdf"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= PDF_CACHE_MAX_BYTES:
+            break
+        if path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        path.with_suffix(".json").unlink(missing_ok=True)
+        total -= size
+        logger.info("[download] Evicted cached PDF: %s", path)
+
 
 async def download_pdf(arxiv_id: str, paper_url: str) -> dict:
     """
     Download the arXiv PDF.
 
-    Returns dict with keys: pdf_path, pdf_bytes.
+    PDFs are cached by a hash of their canonical URL, so every URL form of a
+    paper shares one file, and revalidated with a HEAD request before reuse.
+    Downloads stream straight into the cache file, so only one chunk is held
+    in memory at a time.
+
+    Returns dict with keys: pdf_path.
     """
     pdf_url = to_canonical_pdf_url(paper_url)
     if not pdf_url:
         raise ValueError(f"Cannot derive PDF URL from: {paper_url}")
 
-    pdf_path = PDF_CACHE / f"{arxiv_id.replace('/', '_')}.pdf"
+    pdf_path, meta_path = _cache_paths(pdf_url)
 
-    # Download if not cached
-    if not pdf_path.exists():
-        logger.info("[download] Downloading %s -> %s", pdf_url, pdf_path)
-        async with httpx.AsyncClient(follow_redirects=True, timeout=60.0) as client:
-            resp = await client.get(pdf_url)
-            resp.raise_for_status()
-            pdf_path.write_bytes(resp.content)
-            logger.info("[download] Downloaded %d bytes", len(resp.content))
-    else:
-        logger.info("[download] Using cached PDF: %s", pdf_path)
+    async with httpx.AsyncClient(follow_redirects=True, timeout=60.0) as client:
+        if pdf_path.exists() and await _is_fresh(client, pdf_url, meta_path):
+            logger.info("[download] Using cached PDF for %s: %s", arxiv_id, pdf_path)
+            # Mark as recently used for LRU eviction
+            os.utime(pdf_path)
+        else:
+            logger.info("[download] Downloading %s -> %s", pdf_url, pdf_path)
+            # Write then rename so a concurrent reader never sees a partial PDF
+            tmp_path = pdf_path.with_suffix(".part")
+            async with client.stream("GET", pdf_url) as resp:
+                resp.raise_for_status()
+                with tmp_path.open("wb") as f:
+                    async for chunk in resp.aiter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+            tmp_path.replace(pdf_path)
+            meta_path.write_text(json.dumps(_validators(resp.headers)), encoding="utf-8")
+            _evict_lru(keep=pdf_path)
 
-    pdf_bytes = pdf_path.read_bytes()
-    logger.info("[download] PDF ready: %s (%d bytes)", pdf_path, len(pdf_bytes))
+    logger.info("[download] PDF ready: %s (%d bytes)", pdf_path, pdf_path.stat().st_size)
 
     return {
         "pdf_path": str(pdf_path),
-        "pdf_bytes": pdf_bytes,
     }
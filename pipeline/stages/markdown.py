@@ -1,13 +1,21 @@
 """Stage 2: Convert PDF to structured markdown via Gemini Flash."""
 
 import asyncio
+import functools
 import logging
+import mmap
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from pathlib import Path
 
 import fitz
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 
-from config import GEMINI_API_KEY
+from config import GEMINI_API_KEY, LOCAL_EXTRACTION
+from stages._llm_cache import cached_call, read_cached, write_cached
+from utils.pdf_text import extract_pdf_text, is_clean_extraction
+from utils.ratelimit import GEMINI_LIMITER, retry_with_backoff
 
 logger = logging.getLogger(__name__)
 
@@ -22,18 +30,33 @@ CONVERT_PROMPT = """Convert this academic PDF into clean, well-structured markdo
 
 Return ONLY the markdown content, no explanations."""
 
+# Bump whenever CONVERT_PROMPT or the model changes to invalidate cached output.
+PROMPT_VERSION = "convert-v1"
 
-def _split_pdf_into_chunks(pdf_bytes: bytes, pages_per_chunk: int = 5) -> list[bytes]:
+
+@functools.lru_cache(maxsize=1)
+def _client() -> genai.Client:
+    return genai.Client(api_key=GEMINI_API_KEY)
+
+
+def _split_pdf_into_chunks(pdf_data: bytes | memoryview, pages_per_chunk: int = 5) -> list[bytes]:
     """Split a PDF into chunks of `pages_per_chunk` pages, returned as PDF bytes."""
-    src = fitz.open(stream=pdf_bytes, filetype="pdf")
+    src = fitz.open(stream=pdf_data, filetype="pdf")
     total_pages = len(src)
-    chunks: list[bytes] = []
 
+    # Short papers fit in one chunk; send the original bytes untouched
+    if total_pages <= pages_per_chunk:
+        src.close()
+        return [bytes(pdf_data)]
+
+    chunks: list[bytes] = []
     for start in range(0, total_pages, pages_per_chunk):
         end = min(start + pages_per_chunk, total_pages)
         chunk_doc = fitz.open()
         chunk_doc.insert_pdf(src, from_page=start, to_page=end - 1)
-        chunks.append(chunk_doc.tobytes())
+        # no_new_id keeps the trailer /ID fixed, so the same pages serialize to
+        # the same bytes and hit the per-chunk cache
+        chunks.append(chunk_doc.tobytes(no_new_id=True))
         chunk_doc.close()
 
     src.close()
@@ -42,8 +65,21 @@ def _split_pdf_into_chunks(pdf_bytes: bytes, pages_per_chunk: int = 5) -> list[b
     return chunks
 
 
+def _is_rate_limited(e: Exception) -> bool:
+    return isinstance(e, errors.APIError) and e.code == 429
+
+
 async def _convert_chunk(client: genai.Client, chunk_bytes: bytes, chunk_index: int) -> str:
     """Convert a single PDF chunk to markdown via Gemini."""
+    return await cached_call(
+        "markdown_chunks",
+        chunk_bytes,
+        lambda: _generate_chunk(client, chunk_bytes, chunk_index),
+        version=PROMPT_VERSION,
+    )
+
+
+async def _generate_chunk(client: genai.Client, chunk_bytes: bytes, chunk_index: int) -> str:
     logger.info("[markdown] Converting chunk %d (%d bytes)", chunk_index, len(chunk_bytes))
 
     pdf_part = types.Part.from_bytes(
@@ -51,10 +87,14 @@ async def _convert_chunk(client: genai.Client, chunk_bytes: bytes, chunk_index:
         mime_type="application/pdf",
     )
 
-    response = await client.aio.models.generate_content(
-        model="gemini-3-flash-preview",
-        contents=[CONVERT_PROMPT, pdf_part],
-    )
+    async def generate():
+        async with GEMINI_LIMITER:
+            return await client.aio.models.generate_content(
+                model="gemini-3-flash-preview",
+                contents=[CONVERT_PROMPT, pdf_part],
+            )
+
+    response = await retry_with_backoff(generate, retry_if=_is_rate_limited)
 
     result = response.text
     if not result or not result.strip():
@@ -65,44 +105,84 @@ async def _convert_chunk(client: genai.Client, chunk_bytes: bytes, chunk_index:
     return result.strip()
 
 
-async def _convert_gemini(pdf_bytes: bytes) -> str:
-    """Convert PDF to markdown using Google Gemini (multimodal)."""
-    if not GEMINI_API_KEY:
-        raise RuntimeError("No GEMINI_API_KEY set, cannot convert PDF")
+async def _iter_converted(
+    client: genai.Client, chunks: list[bytes]
+) -> AsyncIterator[tuple[int, str]]:
+    """Yield (chunk_index, markdown) pairs in completion order."""
 
-    logger.info("[markdown] Using Gemini backend (%d bytes)", len(pdf_bytes))
+    async def indexed(idx: int, chunk: bytes) -> tuple[int, str]:
+        return idx, await _convert_chunk(client, chunk, idx)
 
-    client = genai.Client(api_key=GEMINI_API_KEY)
-    chunks = _split_pdf_into_chunks(pdf_bytes)
+    # Concurrency is bounded by GEMINI_LIMITER's requests-per-minute budget
+    tasks = [asyncio.ensure_future(indexed(i, chunk)) for i, chunk in enumerate(chunks)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
 
-    if len(chunks) == 1:
-        results = [await _convert_chunk(client, chunks[0], 0)]
-    else:
-        semaphore = asyncio.Semaphore(8)
 
-        async def limited_convert(idx: int, chunk: bytes) -> str:
-            async with semaphore:
-                return await _convert_chunk(client, chunk, idx)
+async def _convert_gemini(pdf_data: bytes | memoryview) -> tuple[str, int]:
+    """
+    Convert PDF to markdown using Google Gemini (multimodal).
 
-        results = await asyncio.gather(
-            *(limited_convert(i, chunk) for i, chunk in enumerate(chunks))
-        )
+    Returns (markdown, number of chunks that came back empty).
+    """
+    if not GEMINI_API_KEY:
+        raise RuntimeError("No GEMINI_API_KEY set, cannot convert PDF")
+
+    logger.info("[markdown] Using Gemini backend (%d bytes)", len(pdf_data))
+
+    client = _client()
+    chunks = _split_pdf_into_chunks(pdf_data)
+
+    results: list[str] = [""] * len(chunks)
+    empty_count = 0
+    async with aclosing(_iter_converted(client, chunks)) as converted:
+        async for idx, result in converted:
+            results[idx] = result
+            if result:
+                continue
+            empty_count += 1
+            # Fail as soon as the outcome is certain rather than after the slowest chunk
+            if empty_count > len(results) // 2:
+                raise RuntimeError(
+                    f"Too many empty chunks: {empty_count}/{len(results)} returned empty markdown"
+                )
 
-    empty_count = sum(1 for r in results if not r)
-    if empty_count > len(results) // 2:
-        raise RuntimeError(
-            f"Too many empty chunks: {empty_count}/{len(results)} returned empty markdown"
-        )
     if empty_count:
         logger.warning("[markdown] %d/%d chunks were empty, continuing with the rest",
                        empty_count, len(results))
 
-    return "\n\n".join(r for r in results if r)
+    return "\n\n".join(r for r in results if r), empty_count
+
+
+async def _convert_uncached(pdf_data: memoryview) -> str:
+    """Use local extraction when it looks clean, otherwise Gemini."""
+    if LOCAL_EXTRACTION:
+        extracted = await asyncio.to_thread(extract_pdf_text, pdf_data)
+        if is_clean_extraction(extracted):
+            logger.info("[markdown] Local extraction looks clean, skipping Gemini")
+            return extracted["text"]
+
+    markdown, empty_count = await _convert_gemini(pdf_data)
+    # Partial output isn't cached, so a re-ingest retries the empty chunks
+    if markdown and not empty_count:
+        write_cached("markdown", pdf_data, markdown, version=PROMPT_VERSION)
+    return markdown
 
 
-async def convert_pdf_to_markdown(pdf_bytes: bytes) -> str:
-    """Convert PDF bytes to structured markdown using Gemini Flash."""
-    markdown = await _convert_gemini(pdf_bytes)
+async def convert_pdf_to_markdown(pdf_path: Path) -> str:
+    """Convert a PDF file to structured markdown using Gemini Flash."""
+    # Map the file instead of reading it so hashing and chunking see the
+    # page cache directly rather than a full copy in Python memory
+    with open(pdf_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with memoryview(mapped) as pdf_data:
+            # Cached Gemini output wins over a fresh local extraction
+            markdown = read_cached("markdown", pdf_data, version=PROMPT_VERSION)
+            if markdown is None:
+                markdown = await _convert_uncached(pdf_data)
 
     word_count = len(markdown.split())
     logger.info("[markdown] Conversion complete: %d chars, ~%d words",
@@ -1,5 +1,7 @@
 """Stage 4: Save results to Supabase paper_documents + upload to Supermemory."""
 
+import asyncio
+import functools
 import logging
 import re
 
@@ -18,11 +20,45 @@ logger = logging.getLogger(__name__)
 
 SUPERMEMORY_BASE = "https://api.supermemory.ai"
 
+_SM_CLIENT: httpx.AsyncClient | None = None
 
+# In-progress statuses served by /status while their DB write is debounced.
+STATUS_CACHE: dict[str, dict] = {}
+TERMINAL_STATUSES = ("complete", "failed")
+STATUS_FLUSH_DELAY = 0.1
+
+_pending_status: dict[str, dict] = {}
+_status_flush_tasks: dict[str, asyncio.Task] = {}
+
+
+@functools.lru_cache(maxsize=1)
 def _get_supabase():
     return create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
 
 
+def _get_supermemory_client() -> httpx.AsyncClient:
+    """Return the shared Supermemory client, creating it on first use."""
+    global _SM_CLIENT
+    if _SM_CLIENT is None or _SM_CLIENT.is_closed:
+        _SM_CLIENT = httpx.AsyncClient(
+            base_url=SUPERMEMORY_BASE,
+            timeout=30.0,
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {SUPERMEMORY_API_KEY}",
+            },
+        )
+    return _SM_CLIENT
+
+
+async def close_supermemory_client() -> None:
+    """Close the shared Supermemory client (called on app shutdown)."""
+    global _SM_CLIENT
+    if _SM_CLIENT is not None:
+        await _SM_CLIENT.aclose()
+        _SM_CLIENT = None
+
+
 def _sanitize_custom_id(key: str) -> str:
     return re.sub(r"[^a-zA-Z0-9_-]", "_", key)
 
@@ -31,18 +67,28 @@ async def _supermemory_request(
     method: str, path: str, body: dict | None = None
 ) -> dict:
     """Make an authenticated request to Supermemory API."""
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.request(
-            method,
-            f"{SUPERMEMORY_BASE}{path}",
-            json=body,
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {SUPERMEMORY_API_KEY}",
-            },
-        )
-        resp.raise_for_status()
-        return resp.json()
+    resp = await _get_supermemory_client().request(method, path, json=body)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _take_pending_status(arxiv_id: str) -> dict:
+    """Cancel any debounced status write for `arxiv_id` and return its fields."""
+    task = _status_flush_tasks.pop(arxiv_id, None)
+    if task is not None and task is not asyncio.current_task():
+        task.cancel()
+    return _pending_status.pop(arxiv_id, {})
+
+
+async def _flush_status_later(arxiv_id: str) -> None:
+    await asyncio.sleep(STATUS_FLUSH_DELAY)
+    data = _take_pending_status(arxiv_id)
+    if not data:
+        return
+    try:
+        _get_supabase().table("paper_documents").update(data).eq("arxiv_id", arxiv_id).execute()
+    except Exception as e:
+        logger.error("[store] Debounced status write failed for %s: %s", arxiv_id, e)
 
 
 async def update_paper_status(
@@ -51,13 +97,28 @@ async def update_paper_status(
     error_message: str | None = None,
     **extra_fields,
 ) -> None:
-    """Update the paper_documents row in Supabase."""
+    """
+    Update the paper_documents row in Supabase.
+
+    Intermediate statuses are cached in STATUS_CACHE and written after a short
+    debounce window, so consecutive updates collapse into one UPDATE. Terminal
+    statuses flush immediately.
+    """
     logger.info("[store] Updating %s status to '%s'", arxiv_id, status)
-    sb = _get_supabase()
     data = {"status": status, **extra_fields}
     if error_message:
         data["error_message"] = error_message
-    sb.table("paper_documents").update(data).eq("arxiv_id", arxiv_id).execute()
+
+    if status in TERMINAL_STATUSES:
+        data = {**_take_pending_status(arxiv_id), **data}
+        STATUS_CACHE.pop(arxiv_id, None)
+        _get_supabase().table("paper_documents").update(data).eq("arxiv_id", arxiv_id).execute()
+        return
+
+    STATUS_CACHE.setdefault(arxiv_id, {"arxiv_id": arxiv_id}).update(data)
+    _pending_status.setdefault(arxiv_id, {}).update(data)
+    if arxiv_id not in _status_flush_tasks:
+        _status_flush_tasks[arxiv_id] = asyncio.create_task(_flush_status_later(arxiv_id))
 
 
 async def save_results(
@@ -76,9 +137,11 @@ async def save_results(
     cache_path.write_text(densified_markdown, encoding="utf-8")
     logger.info("[store] Cached densified markdown: %s", cache_path)
 
-    # Update paper_documents in Supabase
+    # Update paper_documents in Supabase, folding in any debounced status write
     sb = _get_supabase()
+    STATUS_CACHE.pop(arxiv_id, None)
     sb.table("paper_documents").update({
+        **_take_pending_status(arxiv_id),
         "status": "complete",
         "markdown": markdown,
         "densified_markdown": densified_markdown,
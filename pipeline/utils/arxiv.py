@@ -1,38 +1,46 @@
 """arXiv ID parsing - Python port of src/lib/arxiv.ts."""
 
+import functools
 import re
 from urllib.parse import urlparse
 
 _ARXIV_ID_PATTERN = re.compile(
-    r"^(?:([a-z-]+(?:\.[a-z-]+)?/\d{7})|(\d{4}\.\d{4,5}))(?:v\d+)?(?:\.pdf)?$",
+    r"^((?:[a-z-]+(?:\.[a-z-]+)?/\d{7})|(?:\d{4}\.\d{4,5}))(?:v\d+)?(?:\.pdf)?$",
     re.IGNORECASE,
 )
+_ARXIV_HOST_RE = re.compile(r"(^|\.)arxiv\.org$", re.IGNORECASE)
+# urlparse drops these before parsing, so they can hide "arxiv.org" from a substring check
+_URL_STRIPPED_CHARS = frozenset("\t\r\n")
 
 
 def _parse_arxiv_id(value: str) -> str | None:
     m = _ARXIV_ID_PATTERN.match(value.strip())
-    if not m:
-        return None
-    return m.group(1) or m.group(2) or None
+    return m.group(1) if m else None
 
 
 def is_arxiv_url(url: str) -> bool:
     try:
         parsed = urlparse(url)
-        return bool(re.search(r"(^|\.)arxiv\.org$", parsed.hostname or "", re.IGNORECASE))
+        return bool(_ARXIV_HOST_RE.search(parsed.hostname or ""))
     except Exception:
         return False
 
 
+@functools.lru_cache(maxsize=16384)
 def extract_arxiv_id(url_or_id: str) -> str | None:
     """Extract the arXiv ID from a URL or raw arXiv ID string."""
-    direct = _parse_arxiv_id(url_or_id)
-    if direct:
-        return direct
-    if not is_arxiv_url(url_or_id):
+    # A bare ID has no ':', so URLs skip straight to URL handling
+    if "://" not in url_or_id:
+        direct = _parse_arxiv_id(url_or_id)
+        if direct:
+            return direct
+    # Cheap reject for non-arXiv links before any URL parsing
+    if "arxiv.org" not in url_or_id.lower() and _URL_STRIPPED_CHARS.isdisjoint(url_or_id):
         return None
     try:
         parsed = urlparse(url_or_id)
+        if not _ARXIV_HOST_RE.search(parsed.hostname or ""):
+            return None
         pathname = (parsed.path or "").lstrip("/")
         segments = pathname.split("/")
         if len(segments) < 2:
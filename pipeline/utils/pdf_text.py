@@ -0,0 +1,128 @@
+"""Local PDF text extraction with PyMuPDF, used to skip Gemini on simple layouts."""
+
+import re
+from collections import Counter
+
+import fitz
+
+from utils.text_cleaning import clean_extracted_text
+
+# TextPage flags: same as plain-text extraction, so no image payloads
+_TEXT_FLAGS = fitz.TEXTFLAGS_TEXT
+
+_HEADER_SIZE_RATIO = 1.15  # Spans this much larger than body text are headers
+_MAX_HEADER_CHARS = 150
+_MAX_HEADER_LEVELS = 3
+
+# Thresholds for trusting the local extraction over Gemini
+_MIN_CHARS_PER_PAGE = 500
+_MIN_ASCII_RATIO = 0.9
+_MAX_NARROW_BLOCK_RATIO = 0.3  # Share of body text in half-width blocks (multi-column)
+_NARROW_BLOCK_WIDTH = 0.5
+_INTRO_RE = re.compile(
+    r"^(?:#+\s*)?(?:\d+\.?\s*)?(?:abstract|introduction)\b",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def _join_lines(lines: list[str]) -> str:
+    """Join wrapped lines into one paragraph, undoing end-of-line hyphenation."""
+    joined = lines[0]
+    for line in lines[1:]:
+        if joined.endswith("-") and line[:1].islower():
+            joined = joined[:-1] + line
+        else:
+            joined += " " + line
+    return joined
+
+
+def _block_text_and_size(block: dict) -> tuple[str, float, int]:
+    """Return (text, dominant font size, line count) for a text block."""
+    lines: list[str] = []
+    size_chars: Counter[float] = Counter()
+    for line in block.get("lines", []):
+        text = "".join(span["text"] for span in line["spans"]).strip()
+        if text:
+            lines.append(text)
+        for span in line["spans"]:
+            size_chars[round(span["size"], 1)] += len(span["text"].strip())
+    if not lines or not size_chars:
+        return "", 0.0, 0
+    return _join_lines(lines), size_chars.most_common(1)[0][0], len(lines)
+
+
+def extract_pdf_text(pdf_data: bytes | memoryview) -> dict:
+    """
+    Extract a PDF's text locally, marking larger-font blocks as markdown headers.
+
+    Returns dict with keys: text, pages, narrow_block_ratio.
+    """
+    doc = fitz.open(stream=pdf_data, filetype="pdf")
+    page_count = len(doc)
+
+    # (text, size, line count, is narrow) per block, in reading order
+    blocks: list[tuple[str, float, int, bool]] = []
+    body_sizes: Counter[float] = Counter()
+    for page in doc:
+        page_width = page.rect.width or 1.0
+        # Build the TextPage once with explicit flags and read it directly,
+        # rather than going through get_text()'s per-call setup
+        textpage = page.get_textpage(flags=_TEXT_FLAGS)
+        for block in textpage.extractDICT()["blocks"]:
+            if block.get("type") != 0:
+                continue
+            text, size, line_count = _block_text_and_size(block)
+            if not text:
+                continue
+            x0, _, x1, _ = block["bbox"]
+            blocks.append((text, size, line_count, (x1 - x0) / page_width < _NARROW_BLOCK_WIDTH))
+            body_sizes[size] += len(text)
+    doc.close()
+
+    if not blocks:
+        return {"text": "", "pages": page_count, "narrow_block_ratio": 0.0}
+
+    body_size = body_sizes.most_common(1)[0][0]
+    header_sizes = sorted(
+        (s for s in body_sizes if s >= body_size * _HEADER_SIZE_RATIO), reverse=True
+    )[:_MAX_HEADER_LEVELS]
+    header_levels = {size: level for level, size in enumerate(header_sizes, start=1)}
+
+    paragraphs: list[str] = []
+    headers: dict[str, int] = {}
+    narrow_chars = body_chars = 0
+    for text, size, line_count, narrow in blocks:
+        level = header_levels.get(size)
+        if level and line_count <= 2 and len(text) <= _MAX_HEADER_CHARS:
+            headers.setdefault(text, level)
+        else:
+            body_chars += len(text)
+            if narrow:
+                narrow_chars += len(text)
+        paragraphs.append(text)
+
+    # Clean while headers are still bare lines so section stripping recognizes
+    # "References" etc., then mark the surviving header lines
+    cleaned = clean_extracted_text("\n\n".join(paragraphs))
+    lines = [
+        f"{'#' * headers[line]} {line}" if line in headers else line
+        for line in cleaned.split("\n")
+    ]
+
+    return {
+        "text": "\n".join(lines),
+        "pages": page_count,
+        "narrow_block_ratio": narrow_chars / body_chars if body_chars else 0.0,
+    }
+
+
+def is_clean_extraction(extracted: dict) -> bool:
+    """Heuristically decide whether local extraction is good enough to skip Gemini."""
+    text = extracted["text"]
+    if not text or len(text) < _MIN_CHARS_PER_PAGE * max(extracted["pages"], 1):
+        return False  # Scanned or image-heavy PDF
+    if len(text.encode("ascii", "ignore")) / len(text) < _MIN_ASCII_RATIO:
+        return False  # Math-heavy or non-Latin text that Gemini renders better
+    if extracted["narrow_block_ratio"] > _MAX_NARROW_BLOCK_RATIO:
+        return False  # Multi-column layout
+    return _INTRO_RE.search(text) is not None
@@ -0,0 +1,53 @@
+"""Optional Redis/RQ job queues for running pipelines outside the API process."""
+
+import functools
+
+from config import REDIS_URL
+
+PIPELINE_QUEUE = "pipeline"
+TAG_QUEUE = "tags"
+
+# Worker entrypoints, referenced by import path so the API doesn't import worker.py
+PIPELINE_JOB = "worker.run_pipeline_job"
+TAG_JOB = "worker.tag_constellation_job"
+PIPELINE_JOB_TIMEOUT = 1800
+# RQ discards a pipeline job that waits longer than this to start, so a row still
+# pending after it has lost its job
+PIPELINE_QUEUE_TTL = 3600
+
+# One queued or running pipeline per paper, across API and worker processes
+_PIPELINE_LOCK_KEY = "pipeline-lock:{}"
+
+
+@functools.lru_cache(maxsize=1)
+def _get_redis():
+    from redis import Redis
+
+    return Redis.from_url(REDIS_URL)
+
+
+@functools.lru_cache(maxsize=None)
+def get_queue(name: str):
+    """Return the RQ queue `name`, or None when REDIS_URL isn't configured."""
+    if not REDIS_URL:
+        return None
+    from rq import Queue
+
+    return Queue(name, connection=_get_redis())
+
+
+def acquire_pipeline_lock(arxiv_id: str) -> bool:
+    """Claim the pipeline lock for `arxiv_id`; False if another job holds it."""
+    key = _PIPELINE_LOCK_KEY.format(arxiv_id)
+    # Covers the queue wait; the worker extends it to the job timeout on start.
+    # Expiring means a crashed worker can't wedge the paper.
+    return bool(_get_redis().set(key, "1", nx=True, ex=PIPELINE_QUEUE_TTL))
+
+
+def refresh_pipeline_lock(arxiv_id: str) -> None:
+    """Extend a held pipeline lock to cover the job's run time."""
+    _get_redis().set(_PIPELINE_LOCK_KEY.format(arxiv_id), "1", xx=True, ex=PIPELINE_JOB_TIMEOUT)
+
+
+def release_pipeline_lock(arxiv_id: str) -> None:
+    _get_redis().delete(_PIPELINE_LOCK_KEY.format(arxiv_id))
@@ -0,0 +1,66 @@
+"""Request-rate limiting and backoff for outbound LLM calls."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from config import GEMINI_RPM
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AsyncRateLimiter:
+    """Allow at most `max_rate` entries per `time_period` seconds (sliding window)."""
+
+    def __init__(self, max_rate: int, time_period: float = 60.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._timestamps: deque[float] = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._timestamps and now - self._timestamps[0] >= self.time_period:
+                    self._timestamps.popleft()
+                if len(self._timestamps) < self.max_rate:
+                    self._timestamps.append(now)
+                    return
+                await asyncio.sleep(self.time_period - (now - self._timestamps[0]))
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+
+async def retry_with_backoff(
+    fn: Callable[[], Awaitable[T]],
+    retry_if: Callable[[Exception], bool],
+    attempts: int = 5,
+    min_wait: float = 1.0,
+    max_wait: float = 30.0,
+) -> T:
+    """Await `fn()`, retrying with exponential backoff while `retry_if(exc)` holds."""
+    for attempt in range(attempts):
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt == attempts - 1 or not retry_if(e):
+                raise
+            wait = min(max_wait, min_wait * 2**attempt)
+            logger.warning("[ratelimit] Attempt %d failed (%s), retrying in %.1fs",
+                           attempt + 1, e, wait)
+            await asyncio.sleep(wait)
+    raise AssertionError("unreachable")
+
+
+# Shared across every Gemini call in the process
+GEMINI_LIMITER = AsyncRateLimiter(GEMINI_RPM, 60.0)
@@ -1,15 +1,33 @@
 """Regex-based section stripping for extracted PDF text."""
 
 import re
+from collections import Counter
+
+_REF_RE = re.compile(
+    r"\n\s*(?:References|Bibliography|Works\s+Cited)\s*\n",
+    re.IGNORECASE,
+)
+_ACK_RE = re.compile(
+    r"\n\s*Acknowledg(?:e)?ments?\s*\n",
+    re.IGNORECASE,
+)
+_ACK_NEXT_RE = re.compile(r"\n\s*(?:\d+\.?\s+)?[A-Z][a-z]")
+_TOC_RE = re.compile(
+    r"\n\s*(?:Table\s+of\s+)?Contents?\s*\n",
+    re.IGNORECASE,
+)
+_TOC_NEXT_RE = re.compile(
+    r"\n\s*(?:1\.?\s+|Abstract|Introduction)",
+    re.IGNORECASE,
+)
+_WS_RE = re.compile(r"\n{4,}")
+
+_TOC_WINDOW = 3000  # Only look for a table of contents this close to the start
 
 
 def strip_references(text: str) -> str:
     """Remove the References / Bibliography section and everything after it."""
-    pattern = re.compile(
-        r"\n\s*(?:References|Bibliography|Works\s+Cited)\s*\n",
-        re.IGNORECASE,
-    )
-    m = pattern.search(text)
+    m = _REF_RE.search(text)
     if m:
         return text[: m.start()].rstrip()
     return text
@@ -17,37 +35,26 @@ def strip_references(text: str) -> str:
 
 def strip_acknowledgements(text: str) -> str:
     """Remove Acknowledgements section (but keep text after it if non-ref)."""
-    pattern = re.compile(
-        r"\n\s*Acknowledg(?:e)?ments?\s*\n",
-        re.IGNORECASE,
-    )
-    m = pattern.search(text)
+    m = _ACK_RE.search(text)
     if not m:
         return text
-    # Find next section header after acknowledgements
-    next_section = re.search(r"\n\s*(?:\d+\.?\s+)?[A-Z][a-z]", text[m.end() :])
+    # Find next section header after acknowledgements (searching in place)
+    next_section = _ACK_NEXT_RE.search(text, m.end())
     if next_section:
-        return text[: m.start()] + text[m.end() + next_section.start() :]
+        return text[: m.start()] + text[next_section.start() :]
     return text[: m.start()].rstrip()
 
 
 def strip_table_of_contents(text: str) -> str:
     """Remove table of contents if present near the start."""
-    pattern = re.compile(
-        r"\n\s*(?:Table\s+of\s+)?Contents?\s*\n",
-        re.IGNORECASE,
-    )
-    m = pattern.search(text[:3000])  # Only look in first 3000 chars
+    # endpos/pos bound the searches without slicing copies of the text
+    m = _TOC_RE.search(text, 0, _TOC_WINDOW)
     if not m:
         return text
     # Find next major section header
-    next_section = re.search(
-        r"\n\s*(?:1\.?\s+|Abstract|Introduction)",
-        text[m.end() :],
-        re.IGNORECASE,
-    )
+    next_section = _TOC_NEXT_RE.search(text, m.end())
     if next_section:
-        return text[: m.start()] + text[m.end() + next_section.start() :]
+        return text[: m.start()] + text[next_section.start() :]
     return text
 
 
@@ -57,17 +64,16 @@ def strip_headers_footers(text: str) -> str:
     if len(lines) < 20:
         return text
     # Count line occurrences (exact match after stripping)
-    from collections import Counter
-    stripped = [l.strip() for l in lines]
-    counts = Counter(stripped)
+    counts = Counter(map(str.strip, lines))
+    if len(counts) == len(lines):
+        return text  # Every line is unique, so nothing repeats
     # Lines appearing 3+ times and short (< 80 chars) are likely headers/footers
-    repeated = {
+    repeated = frozenset(
         line
         for line, count in counts.items()
         if count >= 3 and 0 < len(line) < 80
-    }
-    cleaned = [l for l, s in zip(lines, stripped) if s not in repeated]
-    return "\n".join(cleaned)
+    )
+    return "\n".join(l for l in lines if l.strip() not in repeated)
 
 
 def clean_extracted_text(text: str) -> str:
@@ -77,5 +83,5 @@ def clean_extracted_text(text: str) -> str:
     text = strip_acknowledgements(text)
     text = strip_references(text)
     # Collapse excessive whitespace
-    text = re.sub(r"\n{4,}", "\n\n\n", text)
+    text = _WS_RE.sub("\n\n\n", text)
     return text.strip()
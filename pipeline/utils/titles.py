@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import re
 from urllib.parse import urlsplit, urlunsplit
 
@@ -17,8 +18,12 @@ def normalize_paper_title(title: str | None) -> str | None:
     trimmed = title.strip()
     if not trimmed:
         return None
+    if trimmed[0] != "[":
+        return trimmed  # The prefix pattern can only match a leading bracket
 
-    normalized = _LEADING_BRACKET_PREFIXES.sub("", trimmed).strip()
+    # The prefix pattern's trailing \s* already eats the whitespace after the
+    # last bracket, and `trimmed` has none at the end, so no second strip
+    normalized = _LEADING_BRACKET_PREFIXES.sub("", trimmed)
     return normalized or None
 
 
@@ -30,14 +35,71 @@ def normalize_paper_url(url: str | None) -> str | None:
     return trimmed or None
 
 
+# Authority characters the fast path leaves to urlsplit: credentials, IPv6
+# literals and zone IDs
+_UNUSUAL_NETLOC_CHARS = frozenset("@[]%")
+
+
+def _canonical_simple_url(url: str) -> str | None:
+    """
+    Canonicalize a plain scheme://host[:port]/path[?query] URL without urlsplit.
+
+    Mirrors the urlsplit branch of canonical_paper_key; returns None for
+    anything less common so the caller falls back to it.
+    """
+    scheme_end = url.find("://")
+    if scheme_end <= 0 or not (url.isascii() and url.isprintable()):
+        return None
+    scheme = url[:scheme_end]
+    if not scheme.isalpha():
+        return None
+
+    rest = url[scheme_end + 3 :]
+    netloc_end = len(rest)
+    for delim in "/?#":
+        pos = rest.find(delim, 0, netloc_end)
+        if pos >= 0:
+            netloc_end = pos
+    netloc = rest[:netloc_end]
+    if not netloc or not _UNUSUAL_NETLOC_CHARS.isdisjoint(netloc):
+        return None
+
+    hostname, _, port_text = netloc.partition(":")
+    if not hostname:
+        return None
+    port = None
+    if port_text:
+        if not port_text.isdigit() or int(port_text) > 65535:
+            return None  # urlsplit raises on these; let it
+        port = int(port_text)
+
+    scheme = scheme.lower()
+    hostname = hostname.lower()
+    if (scheme == "https" and port == 443) or (scheme == "http" and port == 80) or not port:
+        netloc = hostname
+    else:
+        netloc = f"{hostname}:{port}"
+
+    path, _, query = rest[netloc_end:].partition("#")[0].partition("?")
+    path = path.rstrip("/") or "/"
+    return f"{scheme}://{netloc}{path}?{query}" if query else f"{scheme}://{netloc}{path}"
+
+
+@functools.lru_cache(maxsize=16384)
 def canonical_paper_key(url: str | None) -> str | None:
     normalized_url = normalize_paper_url(url)
     if not normalized_url:
         return None
 
+    # arXiv links return here, before any URL parsing; only the ID can carry
+    # uppercase (old-style subject classes like math.AG)
     arxiv_id = extract_arxiv_id(normalized_url)
     if arxiv_id:
-        return f"https://arxiv.org/pdf/{arxiv_id}.pdf".lower()
+        return f"https://arxiv.org/pdf/{arxiv_id.lower()}.pdf"
+
+    simple = _canonical_simple_url(normalized_url)
+    if simple:
+        return simple
 
     parts = urlsplit(normalized_url)
     if parts.scheme and parts.netloc:
@@ -0,0 +1,55 @@
+"""RQ worker entrypoint - runs ingestion pipelines off the API process.
+
+Usage (from pipeline/):  python worker.py
+"""
+
+import asyncio
+import logging
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+from routers.ingest import _run_pipeline, _tag_constellation
+from stages.store import close_supermemory_client
+from utils.queue import (
+    PIPELINE_QUEUE,
+    TAG_QUEUE,
+    _get_redis,
+    refresh_pipeline_lock,
+    release_pipeline_lock,
+)
+
+
+async def _run_and_close(coro) -> None:
+    # Async clients are bound to the event loop, which asyncio.run tears down
+    try:
+        await coro
+    finally:
+        await close_supermemory_client()
+
+
+def run_pipeline_job(
+    arxiv_id: str,
+    paper_url: str,
+    paper_title: str | None,
+    constellation_id: str,
+) -> None:
+    # The lock's enqueue-time TTL only covered the wait in the queue
+    refresh_pipeline_lock(arxiv_id)
+    try:
+        asyncio.run(_run_and_close(
+            _run_pipeline(arxiv_id, paper_url, paper_title, constellation_id)
+        ))
+    finally:
+        # Taken by /ingest when the job was enqueued
+        release_pipeline_lock(arxiv_id)
+
+
+def tag_constellation_job(arxiv_id: str, constellation_id: str) -> None:
+    asyncio.run(_run_and_close(_tag_constellation(arxiv_id, constellation_id)))
+
+
+if __name__ == "__main__":
+    from rq import Worker
+
+    # Queue order is priority order: pipelines are drained before tag jobs
+    Worker([PIPELINE_QUEUE, TAG_QUEUE], connection=_get_redis()).work()
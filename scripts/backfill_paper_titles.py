@@ -7,7 +7,7 @@ import argparse
 import json
 import os
 import sys
-from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -19,6 +19,17 @@ sys.path.insert(0, str(ROOT / "pipeline"))
 
 from utils.titles import canonical_paper_key, normalize_paper_title, normalize_paper_url  # noqa: E402
 
+# Changed rows written back per upsert request
+UPSERT_BATCH_SIZE = 100
+
+# Every character str.strip() removes, spelled out because POSIX [[:space:]]
+# misses some of them (U+00A0, U+0085, \x1c-\x1f) depending on the server locale
+STRIPPED_WHITESPACE = "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000"
+
+# Postgres regex for the paper titles normalize_paper_title would change: empty,
+# leading whitespace or bracket prefix, or trailing whitespace
+TITLE_NEEDS_NORMALIZATION_PATTERN = f"^$|^[[{STRIPPED_WHITESPACE}]|[{STRIPPED_WHITESPACE}]$"
+
 
 def get_supabase_client():
     url = os.environ.get("SUPABASE_URL") or os.environ.get("NEXT_PUBLIC_SUPABASE_URL")
@@ -32,15 +43,18 @@ def get_supabase_client():
 
 
 def normalize_required_title(value: str | None, fallback: str = "Untitled") -> str:
-    normalized = normalize_paper_title(value)
-    if normalized:
-        return normalized
+    if not value:
+        return fallback
 
-    trimmed = (value or "").strip()
-    if trimmed and not trimmed.startswith("["):
+    trimmed = value.strip()
+    if not trimmed:
+        return fallback
+    if trimmed[0] != "[":
         return trimmed
 
-    return fallback
+    # Only a leading bracket prefix needs the regex; a title that is nothing
+    # but prefixes falls back
+    return normalize_paper_title(trimmed) or fallback
 
 
 def should_sync_label_to_paper_title(label: str | None, next_paper_title: str | None, previous_paper_title: str | None, depth: int | None) -> bool:
@@ -61,6 +75,10 @@ def should_sync_label_to_paper_title(label: str | None, next_paper_title: str |
     )
 
 
+# Node fields normalize_graph always writes
+_NORMALIZED_NODE_FIELDS = frozenset(("paperTitle", "paperUrl", "label"))
+
+
 def normalize_graph(
     graph: dict | None,
     root_paper_title: str | None,
@@ -81,18 +99,25 @@ def normalize_graph(
     if not isinstance(original_nodes, list):
         return graph, stats
 
-    normalized_nodes = [deepcopy(node) for node in original_nodes]
+    # Only top-level scalar fields are rewritten, so a shallow copy suffices
+    normalized_nodes = [dict(node) for node in original_nodes]
     root_override_title = normalize_paper_title(root_paper_title)
     root_override_url = normalize_paper_url(root_paper_url)
     root_override_key = canonical_paper_key(root_override_url)
     normalized_root_label = normalize_required_title(root_label, root_label or "Untitled") if root_label else None
 
     title_by_key: dict[str, str] = {}
-    raw_titles_by_key: dict[str, set[str]] = {}
+    # First node title per key; a key conflicts once any other title shows up
+    first_title_by_key: dict[str, str] = {}
+    conflict_keys: set[str] = set()
 
     if root_override_title and root_override_key:
         title_by_key[root_override_key] = root_override_title
 
+    # Canonical key per node, computed once here and reused by the resolution pass
+    keys: list[str | None] = []
+    graph_changed = False
+
     for original_node, node in zip(original_nodes, normalized_nodes):
         previous_title = original_node.get("paperTitle")
         next_title = normalize_paper_title(previous_title)
@@ -103,20 +128,24 @@ def normalize_graph(
         node["paperUrl"] = normalize_paper_url(original_node.get("paperUrl"))
 
         key = canonical_paper_key(node.get("paperUrl"))
-        if key:
-            raw_titles = raw_titles_by_key.setdefault(key, set())
-            if next_title:
-                raw_titles.add(next_title)
-                if key not in title_by_key:
-                    title_by_key[key] = next_title
-
-    stats["conflicts_coalesced"] = sum(1 for titles in raw_titles_by_key.values() if len(titles) > 1)
-
-    for original_node, node in zip(original_nodes, normalized_nodes):
+        keys.append(key)
+        if key and next_title:
+            first_title = first_title_by_key.get(key)
+            if first_title is None:
+                first_title_by_key[key] = next_title
+                title_by_key.setdefault(key, next_title)
+            elif first_title != next_title:
+                conflict_keys.add(key)
+
+    stats["conflicts_coalesced"] = len(conflict_keys)
+
+    # Titles are only final once every node has been seen, so resolution needs
+    # a second pass; it reuses the keys instead of re-deriving them
+    for original_node, node, key in zip(original_nodes, normalized_nodes, keys):
         if node.get("depth") == 0 and root_override_url and not node.get("paperUrl"):
             node["paperUrl"] = root_override_url
+            key = root_override_key
 
-        key = canonical_paper_key(node.get("paperUrl"))
         if (
             node.get("depth") == 0
             and root_override_title
@@ -124,15 +153,12 @@ def normalize_graph(
         ):
             node["paperTitle"] = root_override_title
 
-        canonical_key = canonical_paper_key(node.get("paperUrl"))
-        if canonical_key and title_by_key.get(canonical_key):
-            node["paperTitle"] = title_by_key[canonical_key]
+        if key and title_by_key.get(key):
+            node["paperTitle"] = title_by_key[key]
 
         original_label = original_node.get("label")
         if node.get("depth") == 0 and normalized_root_label:
             node["label"] = normalized_root_label
-            if node["label"] != original_label:
-                stats["label_changes"] += 1
         elif should_sync_label_to_paper_title(
             original_label,
             node.get("paperTitle"),
@@ -140,10 +166,10 @@ def normalize_graph(
             node.get("depth"),
         ):
             node["label"] = node.get("paperTitle")
-            if node["label"] != original_label:
-                stats["label_changes"] += 1
         else:
             node["label"] = original_label
+        if node["label"] != original_label:
+            stats["label_changes"] += 1
 
         if (
             node.get("paperTitle") != original_node.get("paperTitle")
@@ -151,28 +177,66 @@ def normalize_graph(
             or node.get("label") != original_node.get("label")
         ):
             stats["graph_nodes_changed"] += 1
-
-    normalized_graph = {
-        **graph,
-        "nodes": normalized_nodes,
-    }
-    stats["graph_changed"] = normalized_graph != graph
-    return normalized_graph, stats
+            graph_changed = True
+        elif not graph_changed and not _NORMALIZED_NODE_FIELDS <= original_node.keys():
+            # Filling in a missing field still changes the stored graph
+            graph_changed = True
+
+    # Tracked as nodes are rewritten, so an unchanged graph is returned as-is
+    # without a deep comparison
+    stats["graph_changed"] = graph_changed
+    if not graph_changed:
+        return graph, stats
+    return {**graph, "nodes": normalized_nodes}, stats
+
+
+def flush_upserts(supabase, table: str, pending: list[dict]) -> None:
+    """Write the pending rows back in one bulk upsert keyed on id, then clear them."""
+    if pending:
+        supabase.table(table).upsert(pending, on_conflict="id").execute()
+        pending.clear()
+
+
+def iter_row_batches(
+    supabase,
+    table: str,
+    columns: str,
+    batch_size: int,
+    title_pattern: str | None = None,
+):
+    """
+    Yield pages of rows ordered by id, fetching the next page in the background.
+
+    Keyset pagination on the primary key makes each page an index range scan
+    instead of an OFFSET that re-reads every earlier row. It also means the
+    next page's cursor is known as soon as a page arrives, so its SELECT runs
+    while the caller normalizes the current page.
+    """
+
+    def fetch(last_id):
+        query = supabase.table(table).select(columns).order("id").limit(batch_size)
+        if title_pattern:
+            query = query.filter("paper_title", "match", title_pattern)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        return query.execute().data or []
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        rows = fetch(None)
+        while rows:
+            next_rows = executor.submit(fetch, rows[-1]["id"])
+            yield rows
+            rows = next_rows.result()
 
 
 def process_constellations(supabase, apply_changes: bool, batch_size: int, stats: dict) -> None:
-    offset = 0
-    while True:
-        result = (
-            supabase.table("constellations")
-            .select("id, title, name, topic, paper_title, paper_url, graph_data")
-            .range(offset, offset + batch_size - 1)
-            .execute()
-        )
-        rows = result.data or []
-        if not rows:
-            return
-
+    pending_updates: list[dict] = []
+    for rows in iter_row_batches(
+        supabase,
+        "constellations",
+        "id, title, name, topic, paper_title, paper_url, graph_data",
+        batch_size,
+    ):
         for row in rows:
             stats["constellations_scanned"] += 1
             normalized_name = normalize_required_title(row.get("name") or row.get("title"), row.get("name") or row.get("title") or "Untitled")
@@ -207,30 +271,39 @@ def process_constellations(supabase, apply_changes: bool, batch_size: int, stats
             if normalized_row_title != row.get("paper_title"):
                 payload["paper_title"] = normalized_row_title
                 stats["constellation_row_titles_changed"] += 1
-            if normalized_graph != row.get("graph_data"):
+            if graph_stats["graph_changed"]:
                 payload["graph_data"] = normalized_graph
 
             if payload:
                 stats["constellations_changed"] += 1
                 if apply_changes:
-                    supabase.table("constellations").update(payload).eq("id", row["id"]).execute()
-
-        offset += len(rows)
-
-
-def process_paper_documents(supabase, apply_changes: bool, batch_size: int, stats: dict) -> None:
-    offset = 0
-    while True:
-        result = (
-            supabase.table("paper_documents")
-            .select("id, paper_title")
-            .range(offset, offset + batch_size - 1)
-            .execute()
-        )
-        rows = result.data or []
-        if not rows:
-            return
-
+                    # Bulk upserts need the same keys on every row and an insert-valid
+                    # row (title is NOT NULL), so send every selected column
+                    pending_updates.append({
+                        "id": row["id"],
+                        "title": normalized_name,
+                        "name": normalized_name,
+                        "topic": normalized_topic,
+                        "paper_title": normalized_row_title,
+                        "paper_url": row.get("paper_url"),
+                        "graph_data": normalized_graph,
+                    })
+                    if len(pending_updates) >= UPSERT_BATCH_SIZE:
+                        flush_upserts(supabase, "constellations", pending_updates)
+
+        flush_upserts(supabase, "constellations", pending_updates)
+
+
+def process_paper_documents(supabase, apply_changes: bool, batch_size: int, stats: dict, full_scan: bool) -> None:
+    # Already-normalized titles are filtered out server-side unless full_scan is set
+    pending_updates: list[dict] = []
+    for rows in iter_row_batches(
+        supabase,
+        "paper_documents",
+        "id, arxiv_id, paper_url, paper_title",
+        batch_size,
+        title_pattern=None if full_scan else TITLE_NEEDS_NORMALIZATION_PATTERN,
+    ):
         for row in rows:
             stats["paper_documents_scanned"] += 1
             normalized_title = normalize_paper_title(row.get("paper_title"))
@@ -241,17 +314,28 @@ def process_paper_documents(supabase, apply_changes: bool, batch_size: int, stat
                 stats["paper_documents_changed"] += 1
                 stats["paper_document_titles_changed"] += 1
                 if apply_changes:
-                    supabase.table("paper_documents").update({
+                    # arxiv_id and paper_url are NOT NULL, so the upserted row carries them
+                    pending_updates.append({
+                        "id": row["id"],
+                        "arxiv_id": row["arxiv_id"],
+                        "paper_url": row["paper_url"],
                         "paper_title": normalized_title,
-                    }).eq("id", row["id"]).execute()
+                    })
+                    if len(pending_updates) >= UPSERT_BATCH_SIZE:
+                        flush_upserts(supabase, "paper_documents", pending_updates)
 
-        offset += len(rows)
+        flush_upserts(supabase, "paper_documents", pending_updates)
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("--apply", action="store_true", help="Write changes back to Supabase.")
     parser.add_argument("--batch-size", type=int, default=200, help="Rows to scan per batch.")
+    parser.add_argument(
+        "--full-scan",
+        action="store_true",
+        help="Scan every paper_documents row instead of only titles that look unnormalized.",
+    )
     args = parser.parse_args()
 
     supabase = get_supabase_client()
@@ -274,7 +358,7 @@ def main() -> None:
     }
 
     process_constellations(supabase, args.apply, args.batch_size, stats)
-    process_paper_documents(supabase, args.apply, args.batch_size, stats)
+    process_paper_documents(supabase, args.apply, args.batch_size, stats, args.full_scan)
 
     print(json.dumps(stats, indent=2, sort_keys=True))
 